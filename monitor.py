@@ -19,59 +19,36 @@ la terminal. El script está pensado para ejecutarse en un entorno
 gráfico (X11 o Wayland) de Raspberry Pi OS.
 """
 
-import psutil
+import math
+import queue
 import tkinter as tk
-import time
-from typing import Tuple
-import subprocess
-import os
-import sys
-
-
-def read_temperature() -> float:
-    """Intenta leer la temperatura de la CPU.
-
-    Primero utiliza psutil.sensors_temperatures() y, si no hay
-    sensores disponibles, lee directamente el archivo del kernel
-    en /sys/class/thermal/thermal_zone0/temp.
-
-    Returns:
-        float: temperatura en grados Celsius.
-    """
-    temps = {}  # type: ignore[var-annotated]
-    try:
-        temps = psutil.sensors_temperatures()
-    except Exception:
-        temps = {}
-    # psutil devuelve un diccionario de listas de temperaturas. Para
-    # Raspberry Pi suele estar la clave 'cpu_thermal'.
-    if temps:
-        if 'cpu_thermal' in temps and temps['cpu_thermal']:
-            return float(temps['cpu_thermal'][0].current)
-        # Si 'cpu_thermal' no existe, selecciona la primera entrada
-        first_key = next(iter(temps))
-        first_entry = temps[first_key]
-        if first_entry:
-            return float(first_entry[0].current)
-    # Fallback: leer del archivo del sistema
-    try:
-        with open('/sys/class/thermal/thermal_zone0/temp', 'r') as f:
-            raw = f.read().strip()
-            return float(raw) / 1000.0
-    except FileNotFoundError:
-        # No disponible; devuelve NaN
-        return float('nan')
+from typing import Optional, Tuple
+
+import sampler
+from monitor_graph import GraphMonitor
 
 
 class FloatingMonitor:
     """Monitor de recursos en una ventana flotante."""
 
+    # Intervalo de muestreo pedido al hilo de fondo (s)
+    _SAMPLE_INTERVAL = 2.0
+    # Intervalo de lectura de la cola de muestras (ms)
+    _POLL_MS = 200
+    # Intervalo de sondeo mientras la ventana está minimizada (ms)
+    _HIDDEN_MS = 5000
+    # Texto fijo cuando no hay sensor de temperatura
+    _TEMP_NA_TEXT = 'TEMP: N/A'
+
     def __init__(self) -> None:
         self.root = tk.Tk()
         # Configurar apariencia de la ventana
         self.root.title('Monitor RPi')
         # Eliminar la barra de título y bordes para crear nuestros propios controles
         self.root.overrideredirect(True)
+        # En X11, marcar la ventana como 'dock' para que el gestor de
+        # ventanas no la incluya en el apilado ni en sus animaciones
+        self._set_window_type('dock')
         # Mantener la ventana siempre encima
         self.root.wm_attributes('-topmost', True)
         # Fondo oscuro
@@ -81,33 +58,46 @@ class FloatingMonitor:
         # Bandera para maximizar/restaurar
         self._is_maximized = False
         self._previous_geometry = None
+        # Bandera para recuperar la ventana sin bordes al restaurarla
+        self._iconified = False
         # Crear barra de título personalizada con botones de control
         self._create_title_bar()
         # Permitir arrastrar la ventana (en la barra de título)
         self._add_dragging()
 
-        # Variables para la velocidad de red
-        io = psutil.net_io_counters()
-        self.prev_recv = io.bytes_recv
-        self.prev_sent = io.bytes_sent
-
-        # Crear etiquetas con fuente monoespaciada para mejor alineación
-        font = ('DejaVu Sans Mono', 10)
-        fg_color = 'white'
-        self.cpu_label = tk.Label(self.root, font=font, fg=fg_color, bg='black')
-        self.mem_label = tk.Label(self.root, font=font, fg=fg_color, bg='black')
-        self.disk_label = tk.Label(self.root, font=font, fg=fg_color, bg='black')
-        self.net_label = tk.Label(self.root, font=font, fg=fg_color, bg='black')
-        self.temp_label = tk.Label(self.root, font=font, fg=fg_color, bg='black')
-        # Empaquetar etiquetas
-        for label in (
-            self.cpu_label,
-            self.mem_label,
-            self.disk_label,
-            self.net_label,
-            self.temp_label,
-        ):
-            label.pack(anchor='w')
+        # Cola con las muestras del hilo de fondo (None mientras está oculta)
+        self._queue: Optional[queue.Queue] = None
+        # Ventana de gráficas abierta desde el visor (si la hay)
+        self._graph: Optional[GraphMonitor] = None
+
+        # Un único widget de texto (fuente monoespaciada para alinear) en
+        # lugar de una etiqueta por indicador: una sola actualización por tick
+        # Ancho suficiente para la línea de red a 10 Gbit/s
+        # (↓1220703.1 KB/s  ↑1220703.1 KB/s); sin ajuste de línea, para que
+        # una línea larga nunca empuje la de temperatura fuera de la vista
+        self.text = tk.Text(
+            self.root,
+            height=5,
+            width=40,
+            wrap='none',
+            bg='black',
+            fg='white',
+            font=('DejaVu Sans Mono', 10),
+            bd=0,
+            highlightthickness=0,
+            cursor='arrow',
+            takefocus=0,
+            state='disabled',
+        )
+        self.text.pack(anchor='w', padx=2)
+        # Último texto mostrado, para no tocar Tk si no cambia
+        self._last_text = ''
+        # Plantillas de texto preparadas una sola vez
+        self._cpu_fmt = "CPU:  {:5.1f}%".format
+        self._mem_fmt = "RAM:  {:5.1f}%".format
+        self._disk_fmt = "DISK: {:5.1f}%".format
+        self._net_fmt = "NET:  ↓{:6.1f} KB/s  ↑{:6.1f} KB/s".format
+        self._temp_fmt = "TEMP: {:5.1f}°C".format
 
         # Botón para abrir la ventana de gráficas
         self.graph_button = tk.Button(
@@ -121,6 +111,11 @@ class FloatingMonitor:
         )
         self.graph_button.pack(fill='x', pady=(4, 2))
 
+        # Identificador del próximo tick programado y si la ventana está oculta
+        self._after_id: Optional[str] = None
+        self._hidden = False
+        # Al restaurar la ventana se reanuda enseguida el ritmo normal
+        self.root.bind('<Map>', self._on_map)
         # Iniciar actualización periódica
         self.update_stats()
 
@@ -201,8 +196,23 @@ class FloatingMonitor:
         for btn in (btn_close, btn_max, btn_min):
             btn.pack(side='right', padx=(0, 2))
 
+    def _set_window_type(self, window_type: str) -> None:
+        """Indica al gestor de ventanas el tipo de ventana (sólo X11)."""
+        try:
+            self.root.attributes('-type', window_type)
+        except tk.TclError:
+            # Atributo sólo disponible en X11
+            pass
+
     def _minimize_window(self) -> None:
         """Minimiza la ventana."""
+        # Tk no permite iconificar una ventana con override-redirect: se
+        # devuelve al gestor de ventanas y se vuelve a quitar en _on_map.
+        # Como 'dock' no se puede minimizar ni restaurar desde la barra de
+        # tareas, mientras tanto pasa a ser una ventana normal
+        self._iconified = True
+        self._set_window_type('normal')
+        self.root.overrideredirect(False)
         self.root.iconify()
 
     def _toggle_maximize(self) -> None:
@@ -223,48 +233,85 @@ class FloatingMonitor:
             self._is_maximized = False
 
     def update_stats(self) -> None:
-        """Recoge las estadísticas y actualiza las etiquetas."""
-        # CPU (interval=None para evitar pausa en Tkinter)
-        cpu_percent = psutil.cpu_percent(interval=None)
-        # Memoria
-        mem = psutil.virtual_memory()
-        mem_percent = mem.percent
-        # Disco
-        disk = psutil.disk_usage('/')
-        disk_percent = disk.percent
-        # Red: calcular velocidad en KB/s
-        io = psutil.net_io_counters()
-        down_speed = (io.bytes_recv - self.prev_recv) / 1024.0
-        up_speed = (io.bytes_sent - self.prev_sent) / 1024.0
-        # Actualizar valores previos
-        self.prev_recv = io.bytes_recv
-        self.prev_sent = io.bytes_sent
-        # Temperatura
-        temp_c = read_temperature()
-
-        # Actualizar etiquetas
-        self.cpu_label.config(text=f"CPU:  {cpu_percent:5.1f}%")
-        self.mem_label.config(text=f"RAM:  {mem_percent:5.1f}%")
-        self.disk_label.config(text=f"DISK: {disk_percent:5.1f}%")
-        self.net_label.config(
-            text=f"NET:  ↓{down_speed:6.1f} KB/s  ↑{up_speed:6.1f} KB/s"
-        )
+        """Toma la última muestra del hilo de fondo y actualiza el texto."""
+        # Sin trabajo mientras la ventana no es visible: se deja de recibir
+        # muestras para que el hilo de fondo pueda detenerse
+        if self.root.state() in ('iconic', 'withdrawn'):
+            self._hidden = True
+            if self._queue is not None:
+                sampler.unsubscribe(self._queue)
+                self._queue = None
+            self._after_id = self.root.after(self._HIDDEN_MS, self.update_stats)
+            return
+        self._hidden = False
+        if self._queue is None:
+            self._queue = sampler.subscribe(
+                interval=self._SAMPLE_INTERVAL, maxsize=8
+            )
+        # Sólo interesa la muestra más reciente
+        sample = None
+        try:
+            while True:
+                sample = self._queue.get_nowait()
+        except queue.Empty:
+            pass
+        if sample is not None:
+            self._show_sample(sample)
+        # Programar siguiente lectura de la cola
+        self._after_id = self.root.after(self._POLL_MS, self.update_stats)
+
+    def _show_sample(self, sample: sampler.Sample) -> None:
+        """Muestra los valores de una muestra en el widget de texto."""
         # Mostrar la temperatura con un valor 'N/A' si es NaN
-        temp_text = f"{temp_c:5.1f}°C" if not isinstance(temp_c, float) or not (temp_c != temp_c) else "N/A"
-        self.temp_label.config(text=f"TEMP: {temp_text}")
+        if math.isnan(sample.temp):
+            temp_text = self._TEMP_NA_TEXT
+        else:
+            temp_text = self._temp_fmt(sample.temp)
+        self._set_text('\n'.join((
+            self._cpu_fmt(sample.cpu),
+            self._mem_fmt(sample.mem),
+            self._disk_fmt(sample.disk),
+            self._net_fmt(sample.net_down, sample.net_up),
+            temp_text,
+        )))
 
-        # Programar siguiente actualización tras 1000 ms
-        self.root.after(1000, self.update_stats)
+    def _set_text(self, text: str) -> None:
+        """Sustituye el contenido del widget sólo si el texto ha cambiado."""
+        if text == self._last_text:
+            return
+        self.text.configure(state='normal')
+        self.text.delete('1.0', 'end')
+        self.text.insert('end', text)
+        self.text.configure(state='disabled')
+        self._last_text = text
+
+    def _on_map(self, event: tk.Event) -> None:
+        """Adelanta el siguiente tick cuando la ventana vuelve a mostrarse."""
+        # El evento <Map> también llega desde los widgets hijos
+        if event.widget is not self.root:
+            return
+        if self._iconified:
+            # Restaurada tras minimizar: volver a la ventana sin bordes
+            self._iconified = False
+            self.root.overrideredirect(True)
+            self._set_window_type('dock')
+        if not self._hidden:
+            return
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+        self.update_stats()
 
     def _open_graph_monitor(self) -> None:
-        """Lanza un proceso separado con la ventana de gráficas."""
-        # Ruta al script de gráficas relativa a este archivo
-        script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'monitor_graph.py')
-        # Ejecutar el script con el mismo intérprete de Python
-        try:
-            subprocess.Popen([sys.executable, script_path])
-        except Exception as e:
-            print(f"Error al lanzar monitor de gráficas: {e}")
+        """Abre la ventana de gráficas en este mismo proceso.
+
+        Se crea como Toplevel del visor para que ambas ventanas compartan
+        el hilo de muestreo; si ya está abierta, sólo se trae al frente.
+        """
+        if self._graph is not None and self._graph.root.winfo_exists():
+            self._graph.root.deiconify()
+            self._graph.root.lift()
+            return
+        self._graph = GraphMonitor(master=self.root, max_points=60)
 
     def run(self) -> None:
         """Ejecuta el bucle principal de la interfaz."""
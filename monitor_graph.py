@@ -1,100 +1,267 @@
 """
 monitor_graph.py: ventana de gráficas en tiempo real para Raspberry Pi
 
-Este script abre una ventana independiente con gráficas en tiempo real
+Este script abre una ventana con gráficas en tiempo real
 para el uso de CPU, memoria, disco, velocidades de red y temperatura
 de la CPU. También mantiene un historial de la temperatura y muestra
 los valores máximo y mínimo observados durante la ejecución.
 
-Se apoya en Tkinter para la interfaz de usuario y en matplotlib
-para las gráficas embebidas en la ventana.
+Se apoya únicamente en Tkinter: cada gráfica es un tk.Canvas con
+polilíneas persistentes por serie (una por tramo sin lecturas vacías)
+cuyas coordenadas se actualizan en cada tick, sin necesidad de
+matplotlib.
 
 Requisitos:
   * Python 3 con soporte para Tkinter
   * psutil (para obtener estadísticas del sistema)
-  * matplotlib
 
 Uso:
   python3 monitor_graph.py
 
+También se abre desde el botón 'Abrir gráficas' del visor (monitor.py),
+como ventana secundaria del mismo proceso, de modo que ambas ventanas
+comparten el hilo de muestreo.
+
 Nota: este script está pensado para ejecutarse en un entorno gráfico
 de Raspberry Pi OS u otra distribución de Linux con soporte Tk.
 """
 
-import psutil
+import math
+import queue
 import tkinter as tk
-from typing import List, Tuple
-import matplotlib
+from array import array
+from collections import deque
+from itertools import chain
+from typing import Deque, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import sampler
+
+
+class _Ring:
+    """Historial de tamaño fijo sobre un array('f') circular.
+
+    Guarda las muestras como float32 contiguos (sin un objeto float por
+    valor) y, al iterar, las devuelve de la más antigua a la más reciente
+    mediante vistas memoryview, sin copiar el buffer.
+    """
+
+    def __init__(self, size: int) -> None:
+        self._buf = array('f', [0.0]) * size
+        self._view = memoryview(self._buf)
+        self._size = size
+        self._idx = 0
+        self._filled = 0
+
+    def append(self, value: float) -> None:
+        self._buf[self._idx] = value
+        self._idx = (self._idx + 1) % self._size
+        if self._filled < self._size:
+            self._filled += 1
+
+    def __len__(self) -> int:
+        return self._filled
+
+    def __iter__(self) -> Iterator[float]:
+        if self._filled < self._size:
+            return iter(self._view[:self._filled])
+        return chain(self._view[self._idx:], self._view[:self._idx])
+
+
+class _Chart:
+    """Gráfica de líneas dibujada con primitivas de un tk.Canvas.
+
+    Los elementos fijos (marco, título, leyenda) se crean una sola vez;
+    en cada tick sólo se cambian las coordenadas de las polilíneas.
+    """
+
+    # Márgenes del área de trazado dentro del lienzo (px)
+    _PAD_LEFT = 40
+    _PAD_RIGHT = 8
+    _PAD_TOP = 20
+    _PAD_BOTTOM = 6
+
+    def __init__(
+        self,
+        master: tk.Misc,
+        title: str,
+        colors: Sequence[str],
+        max_points: int,
+        labels: Sequence[str] = (),
+    ) -> None:
+        self.max_points = max_points
+        self.canvas = tk.Canvas(
+            master, width=600, height=150, bg='black', highlightthickness=0
+        )
+        self._width = 600
+        self._height = 150
+        self._ylim = (0.0, 100.0)
+        # Elementos estáticos
+        self._title_id = self.canvas.create_text(
+            0, 2, text=title, fill='white', anchor='n', font=('DejaVu Sans', 9)
+        )
+        self._frame_id = self.canvas.create_rectangle(0, 0, 0, 0, outline='white')
+        self._top_id = self.canvas.create_text(
+            0, 0, fill='white', anchor='e', font=('DejaVu Sans', 7)
+        )
+        self._bottom_id = self.canvas.create_text(
+            0, 0, fill='white', anchor='e', font=('DejaVu Sans', 7)
+        )
+        self._legend_ids = [
+            self.canvas.create_text(
+                0, 0, text=label, fill=color, anchor='ne', font=('DejaVu Sans', 7)
+            )
+            for label, color in zip(labels, colors)
+        ]
+        # Polilíneas persistentes por serie: una por tramo sin huecos (las
+        # lecturas NaN cortan la línea); las que sobran quedan ocultas
+        self._colors = list(colors)
+        self._line_ids: List[List[int]] = [[] for _ in colors]
+        self._visible = [0 for _ in colors]
+        self._series: List[Iterable[float]] = [() for _ in colors]
+        self._xs: List[float] = []
+        self._layout()
+        self.canvas.bind('<Configure>', self._on_resize)
+
+    def pack(self, **kwargs) -> None:
+        self.canvas.pack(**kwargs)
+
+    def get_ylim(self) -> Tuple[float, float]:
+        return self._ylim
+
+    def set_ylim(self, bottom: float, top: float) -> bool:
+        """Ajusta los límites Y; devuelve True si han cambiado.
 
-matplotlib.use('TkAgg')
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
+        Las líneas se recalculan en la siguiente llamada a plot().
+        """
+        if self._ylim == (bottom, top):
+            return False
+        self._ylim = (bottom, top)
+        self._update_tick_labels()
+        return True
+
+    def plot(self, *series: Iterable[float]) -> None:
+        """Muestra los historiales indicados (uno por polilínea).
+
+        Cada historial debe poder recorrerse varias veces, ya que se
+        vuelve a dibujar al redimensionar el lienzo.
+        """
+        self._series = list(series)
+        self._redraw_lines()
+
+    def _on_resize(self, event: tk.Event) -> None:
+        self._width, self._height = event.width, event.height
+        self._layout()
+        self._redraw_lines()
+
+    def _layout(self) -> None:
+        """Recoloca los elementos fijos según el tamaño del lienzo."""
+        left = self._PAD_LEFT
+        right = self._width - self._PAD_RIGHT
+        top = self._PAD_TOP
+        bottom = self._height - self._PAD_BOTTOM
+        self.canvas.coords(self._title_id, self._width / 2, 2)
+        self.canvas.coords(self._frame_id, left, top, right, bottom)
+        self.canvas.coords(self._top_id, left - 4, top)
+        self.canvas.coords(self._bottom_id, left - 4, bottom)
+        for i, legend_id in enumerate(self._legend_ids):
+            self.canvas.coords(legend_id, right - 4, top + 2 + i * 11)
+        # Posiciones X precalculadas, compartidas por todas las series
+        dx = (right - left) / self.max_points
+        self._xs = [left + i * dx for i in range(self.max_points)]
+        self._update_tick_labels()
+
+    def _update_tick_labels(self) -> None:
+        bottom, top = self._ylim
+        self.canvas.itemconfig(self._top_id, text=f"{top:.0f}")
+        self.canvas.itemconfig(self._bottom_id, text=f"{bottom:.0f}")
+
+    def _redraw_lines(self) -> None:
+        ymin, ymax = self._ylim
+        top = self._PAD_TOP
+        bottom = self._height - self._PAD_BOTTOM
+        scale = (bottom - top) / (ymax - ymin) if ymax > ymin else 0.0
+        for index, data in enumerate(self._series):
+            segments = self._segments(data, ymin, ymax, bottom, scale)
+            line_ids = self._line_ids[index]
+            while len(line_ids) < len(segments):
+                line_ids.append(
+                    self.canvas.create_line(
+                        0, 0, 0, 0, fill=self._colors[index], state='hidden'
+                    )
+                )
+            for line_id, coords in zip(line_ids, segments):
+                self.canvas.coords(line_id, *coords)
+            # Mostrar u ocultar sólo los tramos cuyo estado cambia
+            visible = self._visible[index]
+            for line_id in line_ids[visible:len(segments)]:
+                self.canvas.itemconfig(line_id, state='normal')
+            for line_id in line_ids[len(segments):visible]:
+                self.canvas.itemconfig(line_id, state='hidden')
+            self._visible[index] = len(segments)
+
+    def _segments(
+        self, data: Iterable[float], ymin: float, ymax: float, bottom: float, scale: float
+    ) -> List[List[float]]:
+        """Convierte un historial en tramos de coordenadas planas del lienzo.
+
+        Cada lectura NaN (sin dato) cierra el tramo actual, de modo que
+        queda un hueco en la gráfica. Se descartan los tramos de un solo
+        punto, que create_line no puede dibujar.
+        """
+        segments: List[List[float]] = []
+        coords: List[float] = []
+        for x, v in zip(self._xs, data):
+            if math.isnan(v):
+                if len(coords) >= 4:
+                    segments.append(coords)
+                coords = []
+                continue
+            # Recortar al rango visible
+            if v < ymin:
+                v = ymin
+            elif v > ymax:
+                v = ymax
+            coords.extend((x, bottom - (v - ymin) * scale))
+        if len(coords) >= 4:
+            segments.append(coords)
+        return segments
 
 
 class GraphMonitor:
     """Ventana con gráficas en tiempo real."""
 
-    def __init__(self, max_points: int = 60) -> None:
+    # Intervalo de muestreo pedido al hilo de fondo (s)
+    _SAMPLE_INTERVAL = 1.0
+    # Intervalo de lectura de la cola de muestras (ms)
+    _POLL_MS = 200
+    # Intervalo de sondeo mientras la ventana está minimizada (ms)
+    _HIDDEN_MS = 5000
+
+    def __init__(self, master: Optional[tk.Misc] = None, max_points: int = 60) -> None:
         # Número de muestras a mantener en el historial
         self.max_points = max_points
-        # Inicializar datos
-        self.cpu_data: List[float] = []
-        self.mem_data: List[float] = []
-        self.disk_data: List[float] = []
-        self.net_down_data: List[float] = []
-        self.net_up_data: List[float] = []
-        self.temp_data: List[float] = []
-        self.prev_recv = psutil.net_io_counters().bytes_recv
-        self.prev_sent = psutil.net_io_counters().bytes_sent
+        # Inicializar datos (buffers circulares de float32)
+        self.cpu_data = _Ring(max_points)
+        self.mem_data = _Ring(max_points)
+        self.disk_data = _Ring(max_points)
+        self.net_down_data = _Ring(max_points)
+        self.net_up_data = _Ring(max_points)
+        self.temp_data = _Ring(max_points)
+        # Cola con las muestras del hilo de fondo (None mientras está oculta)
+        self._queue: Optional[queue.Queue] = None
         self.max_temp = float('-inf')
         self.min_temp = float('inf')
+        # Máximo de red en la ventana deslizante: pares (valor, nº de tick)
+        # con valores estrictamente decrecientes; el primero es el máximo
+        self._tick = 0
+        self._net_window_max: Deque[Tuple[float, int]] = deque()
 
-        # Configurar ventana
-        self.root = tk.Tk()
+        # Configurar ventana: secundaria si se abre desde el visor
+        self.root = tk.Tk() if master is None else tk.Toplevel(master)
+        self.root.protocol('WM_DELETE_WINDOW', self.close)
         self.root.title('Monitor RPi - Gráficas')
         # Modo oscuro para la ventana principal
         self.root.configure(bg='black')
-        # Crear figura con subgráficas
-        self.fig = Figure(figsize=(6, 8), dpi=100)
-        # Fondo oscuro para la figura
-        self.fig.patch.set_facecolor('black')
-        # Ejes
-        gs = self.fig.add_gridspec(5, 1)
-        self.ax_cpu = self.fig.add_subplot(gs[0, 0])
-        self.ax_mem = self.fig.add_subplot(gs[1, 0])
-        self.ax_disk = self.fig.add_subplot(gs[2, 0])
-        self.ax_net = self.fig.add_subplot(gs[3, 0])
-        self.ax_temp = self.fig.add_subplot(gs[4, 0])
-        # Configurar títulos de ejes con color blanco
-        self.ax_cpu.set_title('Uso CPU (%)', color='white')
-        self.ax_mem.set_title('Uso Memoria (%)', color='white')
-        self.ax_disk.set_title('Uso Disco (%)', color='white')
-        self.ax_net.set_title('Velocidad Red (KB/s)', color='white')
-        self.ax_temp.set_title('Temperatura CPU (°C)', color='white')
-        # Crear líneas con colores visibles en modo oscuro
-        (self.cpu_line,) = self.ax_cpu.plot([], [], color='red')
-        (self.mem_line,) = self.ax_mem.plot([], [], color='deepskyblue')
-        (self.disk_line,) = self.ax_disk.plot([], [], color='lime')
-        (self.net_down_line,) = self.ax_net.plot([], [], label='Descarga', color='orange')
-        (self.net_up_line,) = self.ax_net.plot([], [], label='Subida', color='cyan')
-        (self.temp_line,) = self.ax_temp.plot([], [], color='magenta')
-        self.ax_net.legend(loc='upper right', fontsize='x-small', facecolor='black', edgecolor='black', labelcolor='white')
-        # Ajustar límites iniciales
-        for ax in (self.ax_cpu, self.ax_mem, self.ax_disk):
-            ax.set_ylim(0, 100)
-        self.ax_net.set_ylim(0, 100)  # valor inicial, ajustado dinámicamente
-        self.ax_temp.set_ylim(0, 100)
-        # Configuración visual para modo oscuro
-        for ax in (self.ax_cpu, self.ax_mem, self.ax_disk, self.ax_net, self.ax_temp):
-            ax.set_xlim(0, self.max_points)
-            ax.tick_params(colors='white', labelsize=8)
-            ax.spines['bottom'].set_color('white')
-            ax.spines['top'].set_color('white')
-            ax.spines['left'].set_color('white')
-            ax.spines['right'].set_color('white')
-            ax.yaxis.label.set_color('white')
-            ax.xaxis.label.set_color('white')
-            ax.set_facecolor('black')
         # Etiqueta para valores máx/min de temperatura en modo oscuro
         self.temp_stats_label = tk.Label(
             self.root,
@@ -103,86 +270,129 @@ class GraphMonitor:
             bg='black'
         )
         self.temp_stats_label.pack(side='bottom', pady=2)
-        # Canvas de matplotlib
-        self.canvas = FigureCanvasTkAgg(self.fig, master=self.root)
-        self.canvas.draw()
-        self.canvas.get_tk_widget().pack(fill='both', expand=True)
+        # Gráficas con colores visibles en modo oscuro
+        self.cpu_chart = _Chart(self.root, 'Uso CPU (%)', ('red',), max_points)
+        self.mem_chart = _Chart(self.root, 'Uso Memoria (%)', ('deepskyblue',), max_points)
+        self.disk_chart = _Chart(self.root, 'Uso Disco (%)', ('lime',), max_points)
+        self.net_chart = _Chart(
+            self.root,
+            'Velocidad Red (KB/s)',
+            ('orange', 'cyan'),
+            max_points,
+            labels=('Descarga', 'Subida'),
+        )
+        self.temp_chart = _Chart(self.root, 'Temperatura CPU (°C)', ('magenta',), max_points)
+        for chart in (
+            self.cpu_chart,
+            self.mem_chart,
+            self.disk_chart,
+            self.net_chart,
+            self.temp_chart,
+        ):
+            chart.pack(fill='both', expand=True)
+        # Identificador del próximo tick programado y si la ventana está oculta
+        self._after_id: Optional[str] = None
+        self._hidden = False
+        # Al restaurar la ventana se reanuda enseguida el ritmo normal
+        self.root.bind('<Map>', self._on_map)
         # Iniciar actualización
         self.update_graphs()
 
     def update_graphs(self) -> None:
-        """Actualiza los datos y las gráficas."""
-        # Recoger nuevos datos
-        self.cpu_data.append(psutil.cpu_percent(interval=None))
-        self.mem_data.append(psutil.virtual_memory().percent)
-        self.disk_data.append(psutil.disk_usage('/').percent)
-        # Net speed
-        io = psutil.net_io_counters()
-        down_speed = (io.bytes_recv - self.prev_recv) / 1024.0
-        up_speed = (io.bytes_sent - self.prev_sent) / 1024.0
-        self.prev_recv, self.prev_sent = io.bytes_recv, io.bytes_sent
-        self.net_down_data.append(down_speed)
-        self.net_up_data.append(up_speed)
-        # Temp
-        temp = self._read_temp()
-        self.temp_data.append(temp)
-        # Actualizar máximos y mínimos de temperatura
-        if temp > self.max_temp:
-            self.max_temp = temp
-        if temp < self.min_temp:
-            self.min_temp = temp
-        # Ajustar longitud de listas
-        for lst in (self.cpu_data, self.mem_data, self.disk_data, self.net_down_data, self.net_up_data, self.temp_data):
-            if len(lst) > self.max_points:
-                lst.pop(0)
-        x_vals = list(range(len(self.cpu_data)))
+        """Incorpora las muestras recibidas y actualiza las gráficas."""
+        # Sin trabajo mientras la ventana no es visible: se deja de recibir
+        # muestras para que el hilo de fondo pueda detenerse
+        if self.root.state() in ('iconic', 'withdrawn'):
+            self._hidden = True
+            if self._queue is not None:
+                sampler.unsubscribe(self._queue)
+                self._queue = None
+            self._after_id = self.root.after(self._HIDDEN_MS, self.update_graphs)
+            return
+        self._hidden = False
+        if self._queue is None:
+            self._queue = sampler.subscribe(
+                interval=self._SAMPLE_INTERVAL, maxsize=self.max_points
+            )
+        # Incorporar todas las muestras pendientes al historial
+        sample = None
+        try:
+            while True:
+                sample = self._queue.get_nowait()
+                self._add_sample(sample)
+        except queue.Empty:
+            pass
+        if sample is None:
+            self._after_id = self.root.after(self._POLL_MS, self.update_graphs)
+            return
         # Actualizar líneas
-        self.cpu_line.set_data(x_vals, self.cpu_data)
-        self.mem_line.set_data(x_vals, self.mem_data)
-        self.disk_line.set_data(x_vals, self.disk_data)
-        # Red
-        self.net_down_line.set_data(x_vals, self.net_down_data)
-        self.net_up_line.set_data(x_vals, self.net_up_data)
-        # Ajustar límites Y de red dinámicamente
-        max_net = max(self.net_down_data + self.net_up_data + [1])
-        self.ax_net.set_ylim(0, max(max_net * 1.2, 10))
-        # Temperatura
-        self.temp_line.set_data(x_vals, self.temp_data)
-        max_temp_data = max(self.temp_data)
-        min_temp_data = min(self.temp_data)
-        # Ajustar límites Y de temperatura con margen
-        self.ax_temp.set_ylim(min(self.temp_data) - 5, max(self.temp_data) + 5)
+        self.cpu_chart.plot(self.cpu_data)
+        self.mem_chart.plot(self.mem_data)
+        self.disk_chart.plot(self.disk_data)
+        # Red: reajustar el límite Y sólo si el nuevo tope se aleja
+        # bastante del actual
+        max_net = max(self._net_window_max[0][0], 1)
+        net_top = max(max_net * 1.2, 10)
+        current_top = self.net_chart.get_ylim()[1]
+        if net_top > current_top * 1.1 or net_top < current_top * 0.5:
+            self.net_chart.set_ylim(0, net_top)
+        self.net_chart.plot(self.net_down_data, self.net_up_data)
+        # Temperatura: límites Y con margen sobre los extremos de la sesión
+        if self.min_temp <= self.max_temp:
+            self.temp_chart.set_ylim(self.min_temp - 5, self.max_temp + 5)
+        self.temp_chart.plot(self.temp_data)
         # Actualizar estadísticas de temperatura
         self.temp_stats_label.config(
-            text=f"Temp actual: {temp:.1f}°C  •  Máx: {self.max_temp:.1f}°C  •  Mín: {self.min_temp:.1f}°C"
+            text=f"Temp actual: {sample.temp:.1f}°C  •  Máx: {self.max_temp:.1f}°C  •  Mín: {self.min_temp:.1f}°C"
         )
-        # Ajustar ejes X para todas las gráficas
-        for ax in (self.ax_cpu, self.ax_mem, self.ax_disk, self.ax_net, self.ax_temp):
-            ax.set_xlim(0, self.max_points)
-        # Redibujar
-        self.canvas.draw()
         # Programar siguiente actualización
-        self.root.after(1000, self.update_graphs)
+        self._after_id = self.root.after(self._POLL_MS, self.update_graphs)
 
-    def _read_temp(self) -> float:
-        """Obtiene la temperatura de la CPU en °C."""
-        # Usar psutil.sensors_temperatures si está disponible
-        try:
-            temps = psutil.sensors_temperatures()
-            if temps:
-                if 'cpu_thermal' in temps and temps['cpu_thermal']:
-                    return float(temps['cpu_thermal'][0].current)
-                first_key = next(iter(temps))
-                if temps[first_key]:
-                    return float(temps[first_key][0].current)
-        except Exception:
-            pass
-        # Fallback: leer archivo del sistema
-        try:
-            with open('/sys/class/thermal/thermal_zone0/temp', 'r') as f:
-                return float(f.read().strip()) / 1000.0
-        except Exception:
-            return float('nan')
+    def _add_sample(self, sample: sampler.Sample) -> None:
+        """Añade una muestra a los historiales."""
+        self.cpu_data.append(sample.cpu)
+        self.mem_data.append(sample.mem)
+        self.disk_data.append(sample.disk)
+        self.net_down_data.append(sample.net_down)
+        self.net_up_data.append(sample.net_up)
+        self._push_net_peak(max(sample.net_down, sample.net_up))
+        self.temp_data.append(sample.temp)
+        # Actualizar máximos y mínimos de temperatura
+        if sample.temp > self.max_temp:
+            self.max_temp = sample.temp
+        if sample.temp < self.min_temp:
+            self.min_temp = sample.temp
+
+    def _on_map(self, event: tk.Event) -> None:
+        """Adelanta el siguiente tick cuando la ventana vuelve a mostrarse."""
+        # El evento <Map> también llega desde los widgets hijos
+        if event.widget is not self.root or not self._hidden:
+            return
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+        self.update_graphs()
+
+    def _push_net_peak(self, peak: float) -> None:
+        """Añade el pico de red del tick actual a la ventana de máximos."""
+        window = self._net_window_max
+        # Los valores menores o iguales nunca volverán a ser el máximo
+        while window and window[-1][0] <= peak:
+            window.pop()
+        window.append((peak, self._tick))
+        # Descartar el máximo si ya salió del historial visible
+        if window[0][1] <= self._tick - self.max_points:
+            window.popleft()
+        self._tick += 1
+
+    def close(self) -> None:
+        """Cierra la ventana y deja de recibir muestras."""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        if self._queue is not None:
+            sampler.unsubscribe(self._queue)
+            self._queue = None
+        self.root.destroy()
 
     def run(self) -> None:
         self.root.mainloop()
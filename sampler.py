@@ -0,0 +1,375 @@
+"""
+sampler.py: muestreo de recursos en un hilo de fondo
+
+Este módulo concentra todas las lecturas del sistema (CPU, memoria,
+disco, red y temperatura) que antes hacía cada ventana por su cuenta.
+Un único hilo en segundo plano toma las muestras y las reparte a las
+colas de los suscriptores, de modo que el bucle de Tk nunca espera a
+una llamada al sistema.
+
+Uso:
+  import sampler
+
+  q = sampler.subscribe(interval=2.0)
+  ...
+  sample = q.get_nowait()   # sampler.Sample
+
+El hilo muestrea al intervalo más corto que haya pedido alguno de los
+suscriptores y sólo trabaja mientras haya al menos una cola suscrita.
+El visor y la ventana de gráficas comparten el proceso y, por tanto,
+el mismo hilo.
+"""
+
+import os
+import psutil
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# Prefijos de interfaces virtuales que no cuentan para el tráfico real
+_SKIP_IFACE_PREFIXES = ('lo', 'docker', 'veth', 'br-')
+
+
+def _active_interfaces() -> List[str]:
+    """Devuelve las interfaces de red activas, sin las virtuales."""
+    return [
+        name
+        for name, stats in psutil.net_if_stats().items()
+        if stats.isup and not name.startswith(_SKIP_IFACE_PREFIXES)
+    ]
+
+
+def _net_counters(ifaces: List[str]) -> Dict[str, Tuple[int, int]]:
+    """Lee (bytes recibidos, bytes enviados) de cada interfaz indicada.
+
+    psutil ya corrige la vuelta de los contadores de 32 bits de cada
+    interfaz (nowrap=True por defecto).
+    """
+    per_nic = psutil.net_io_counters(pernic=True)
+    return {
+        name: (per_nic[name].bytes_recv, per_nic[name].bytes_sent)
+        for name in ifaces
+        if name in per_nic
+    }
+
+
+def _net_delta(
+    cur: Dict[str, Tuple[int, int]], prev: Dict[str, Tuple[int, int]]
+) -> Tuple[int, int]:
+    """Bytes (recibidos, enviados) entre dos lecturas de _net_counters().
+
+    Cada interfaz se compara con su propia lectura anterior: una interfaz
+    nueva, o cuyo contador retrocede porque se ha reiniciado, cuenta como
+    0 en ese tick, y una que desaparece simplemente deja de sumarse.
+    """
+    recv = sent = 0
+    for name, (cur_recv, cur_sent) in cur.items():
+        prev_counters = prev.get(name)
+        if prev_counters is not None:
+            recv += max(0, cur_recv - prev_counters[0])
+            sent += max(0, cur_sent - prev_counters[1])
+    return recv, sent
+
+
+# Primera línea de /proc/stat: tiempos acumulados de todas las CPU
+_PROC_STAT_PATH = '/proc/stat'
+# Descriptor persistente de /proc/stat (se abre en la primera lectura)
+_STAT_FD: Optional[int] = None
+_STAT_FD_TRIED = False
+# Última lectura (tiempo inactivo, tiempo total) en ticks del kernel
+_cpu_times = [0, 0]
+
+
+def _stat_fd() -> Optional[int]:
+    """Devuelve el descriptor abierto de /proc/stat o None si no existe."""
+    global _STAT_FD, _STAT_FD_TRIED
+    if not _STAT_FD_TRIED:
+        _STAT_FD_TRIED = True
+        try:
+            _STAT_FD = os.open(_PROC_STAT_PATH, os.O_RDONLY)
+        except OSError:
+            _STAT_FD = None
+    return _STAT_FD
+
+
+def read_cpu_busy() -> float:
+    """Porcentaje de CPU ocupada desde la llamada anterior.
+
+    Lee sólo la línea agregada 'cpu' de /proc/stat con un único pread
+    sobre un descriptor persistente. Fuera de Linux recurre a
+    psutil.cpu_percent(). La primera llamada devuelve el promedio
+    desde el arranque del sistema.
+    """
+    fd = _stat_fd()
+    if fd is None:
+        return psutil.cpu_percent(interval=None)
+    line = os.pread(fd, 256, 0).split(b'\n', 1)[0]
+    # user nice system idle iowait irq softirq steal
+    fields = [int(v) for v in line.split()[1:9]]
+    idle = fields[3] + fields[4]
+    total = sum(fields)
+    idle_delta = idle - _cpu_times[0]
+    total_delta = total - _cpu_times[1]
+    _cpu_times[0], _cpu_times[1] = idle, total
+    if total_delta <= 0:
+        return 0.0
+    return 100.0 * (1.0 - idle_delta / total_delta)
+
+
+# Archivo del kernel con la temperatura de la CPU en milésimas de grado
+_THERMAL_PATH = '/sys/class/thermal/thermal_zone0/temp'
+
+
+def _nan_temperature() -> float:
+    return float('nan')
+
+
+def _pick_temp_reader() -> Callable[[], float]:
+    """Elige una sola vez la forma de leer la temperatura de la CPU.
+
+    La disposición de los sensores no cambia durante la ejecución, así
+    que se sondea al importar el módulo y se devuelve una función sin
+    argumentos especializada para el sensor encontrado:
+
+      * /sys/class/thermal/thermal_zone0/temp con un descriptor que se
+        mantiene abierto (un único pread por lectura);
+      * si no existe, la entrada de psutil.sensors_temperatures()
+        ('cpu_thermal' en Raspberry Pi, o la primera disponible);
+      * si no hay sensor, una función que devuelve NaN.
+    """
+    try:
+        fd = os.open(_THERMAL_PATH, os.O_RDONLY)
+    except OSError:
+        pass
+    else:
+        try:
+            int(os.pread(fd, 16, 0))
+        except (OSError, ValueError):
+            # Sensor presente pero ilegible: cerrar y probar con psutil
+            os.close(fd)
+        else:
+            def read_sysfs() -> float:
+                try:
+                    return int(os.pread(fd, 16, 0)) / 1000.0
+                except (OSError, ValueError):
+                    return float('nan')
+            return read_sysfs
+
+    try:
+        temps = psutil.sensors_temperatures()
+    except Exception:
+        temps = {}
+    # psutil devuelve un diccionario de listas de temperaturas. Para
+    # Raspberry Pi suele estar la clave 'cpu_thermal'; si no existe,
+    # se selecciona la primera entrada con lecturas
+    key = 'cpu_thermal' if temps.get('cpu_thermal') else None
+    if key is None:
+        key = next((name for name, entries in temps.items() if entries), None)
+    if key is None:
+        return _nan_temperature
+
+    def read_psutil() -> float:
+        try:
+            entries = psutil.sensors_temperatures().get(key)
+        except Exception:
+            entries = None
+        return float(entries[0].current) if entries else float('nan')
+    return read_psutil
+
+
+# Temperatura de la CPU en grados Celsius (NaN si no hay sensor)
+read_temperature = _pick_temp_reader()
+
+
+@dataclass(frozen=True)
+class Sample:
+    """Lectura de todos los indicadores en un instante."""
+
+    timestamp: float
+    cpu: float
+    mem: float
+    disk: float
+    net_down: float
+    net_up: float
+    temp: float
+
+
+class Sampler:
+    """Hilo de fondo que toma muestras y las reparte a los suscriptores."""
+
+    # Segundos entre muestras si el suscriptor no indica otro intervalo
+    DEFAULT_INTERVAL = 1.0
+    # Segundos durante los que se reutiliza el último uso de disco leído
+    _DISK_TTL = 15.0
+    # Segundos entre revisiones de la lista de interfaces de red
+    _IFACE_TTL = 60.0
+    # Intervalo mínimo (s) para recalcular la velocidad de red
+    _MIN_NET_DT = 0.1
+    # Espera (s) entre las lecturas de referencia y la primera muestra
+    _WARMUP = 0.25
+
+    def __init__(self) -> None:
+        # Cola de cada suscriptor -> intervalo de muestreo pedido (s)
+        self._subscribers: Dict[queue.Queue, float] = {}
+        self._lock = threading.Lock()
+        # Se despierta al hilo cuando llega el primer suscriptor
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # El muestreador se crea desde el hilo de Tk: las primeras lecturas
+        # del sistema las hace el hilo de fondo en _reset_baselines()
+        # Variables para la velocidad de red
+        self._ifaces: List[str] = []
+        self._ifaces_ts = float('-inf')
+        self.prev_counters: Dict[str, Tuple[int, int]] = {}
+        self._last_net_ts = float('-inf')
+        self._net_speeds = (0.0, 0.0)
+        # El uso de disco cambia muy despacio: se guarda (marca de tiempo,
+        # porcentaje) y sólo se vuelve a leer pasados _DISK_TTL segundos
+        self._disk_cache = (float('-inf'), 0.0)
+
+    def subscribe(
+        self, interval: float = DEFAULT_INTERVAL, maxsize: int = 0
+    ) -> queue.Queue:
+        """Crea una cola que recibirá cada nueva muestra.
+
+        Se garantiza al menos una muestra cada `interval` segundos; si
+        otro suscriptor pide un intervalo menor, las muestras llegan a
+        ese ritmo a todas las colas.
+        """
+        q: queue.Queue = queue.Queue(maxsize)
+        with self._lock:
+            self._subscribers[q] = interval
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='sampler', daemon=True
+                )
+                self._thread.start()
+        self._wakeup.set()
+        return q
+
+    def unsubscribe(self, q: queue.Queue) -> None:
+        """Deja de enviar muestras a la cola indicada."""
+        with self._lock:
+            self._subscribers.pop(q, None)
+
+    def sample(self) -> Sample:
+        """Recoge una muestra de todos los indicadores."""
+        now = time.monotonic()
+        # CPU (lectura directa de /proc/stat)
+        cpu_percent = read_cpu_busy()
+        # Memoria
+        mem_percent = psutil.virtual_memory().percent
+        # Disco (statvfs puede bloquearse con el disco ocupado: usar caché)
+        if now - self._disk_cache[0] > self._DISK_TTL:
+            self._disk_cache = (now, psutil.disk_usage('/').percent)
+        # Red: refrescar periódicamente la lista de interfaces; como cada
+        # una se compara con su propia lectura anterior, basta con sustituirla
+        if now - self._ifaces_ts > self._IFACE_TTL:
+            self._ifaces = _active_interfaces()
+            self._ifaces_ts = now
+        # Con un intervalo demasiado corto se repite la última velocidad
+        # en lugar de dividir por casi cero
+        dt = now - self._last_net_ts
+        if dt >= self._MIN_NET_DT:
+            counters = _net_counters(self._ifaces)
+            recv_delta, sent_delta = _net_delta(counters, self.prev_counters)
+            self._net_speeds = (
+                recv_delta / 1024.0 / dt,
+                sent_delta / 1024.0 / dt,
+            )
+            self._last_net_ts = now
+            self.prev_counters = counters
+        down_speed, up_speed = self._net_speeds
+        return Sample(
+            timestamp=now,
+            cpu=cpu_percent,
+            mem=mem_percent,
+            disk=self._disk_cache[1],
+            net_down=down_speed,
+            net_up=up_speed,
+            temp=read_temperature(),
+        )
+
+    def _reset_baselines(self) -> None:
+        """Toma las lecturas de referencia antes de la primera muestra.
+
+        Se llama desde el hilo de fondo al arrancar y tras cada periodo sin
+        suscriptores. Se releen las interfaces y el uso de disco, y se
+        descartan las lecturas de CPU y red: sólo sirven para que la
+        primera muestra no promedie todo el periodo inactivo.
+        """
+        now = time.monotonic()
+        read_cpu_busy()
+        self._ifaces = _active_interfaces()
+        self._ifaces_ts = now
+        self.prev_counters = _net_counters(self._ifaces)
+        self._last_net_ts = now
+        self._disk_cache = (now, psutil.disk_usage('/').percent)
+
+    def _run(self) -> None:
+        """Bucle del hilo: muestrea mientras haya suscriptores."""
+        # Al arrancar y al despertar se renuevan las referencias
+        resumed = True
+        next_ts = time.monotonic()
+        while True:
+            with self._lock:
+                subscribers = list(self._subscribers)
+                interval = min(self._subscribers.values(), default=0.0)
+                if not subscribers:
+                    self._wakeup.clear()
+            if not subscribers:
+                # Sin suscriptores no se toca el sistema hasta el siguiente
+                self._wakeup.wait()
+                resumed = True
+                continue
+            if resumed:
+                resumed = False
+                try:
+                    self._reset_baselines()
+                except Exception:
+                    pass
+                time.sleep(self._WARMUP)
+                next_ts = time.monotonic()
+            try:
+                s = self.sample()
+            except Exception:
+                # Un fallo puntual de lectura (p. ej. OSError) no debe
+                # detener el hilo: se omite esta muestra
+                pass
+            else:
+                for q in subscribers:
+                    try:
+                        q.put_nowait(s)
+                    except queue.Full:
+                        # Suscriptor atrasado: se descarta la muestra
+                        pass
+            # Si el muestreo se ha retrasado, no intentar recuperar ticks
+            next_ts = max(next_ts + interval, time.monotonic())
+            time.sleep(max(0.0, next_ts - time.monotonic()))
+
+
+_sampler: Optional[Sampler] = None
+_sampler_lock = threading.Lock()
+
+
+def _get_sampler() -> Sampler:
+    global _sampler
+    with _sampler_lock:
+        if _sampler is None:
+            _sampler = Sampler()
+        return _sampler
+
+
+def subscribe(
+    interval: float = Sampler.DEFAULT_INTERVAL, maxsize: int = 0
+) -> queue.Queue:
+    """Suscribe una nueva cola al muestreador compartido del proceso."""
+    return _get_sampler().subscribe(interval, maxsize)
+
+
+def unsubscribe(q: queue.Queue) -> None:
+    """Retira una cola del muestreador compartido del proceso."""
+    _get_sampler().unsubscribe(q)